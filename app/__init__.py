@@ -4,9 +4,47 @@ Privacy-Preserving AI Chatbot
 """
 
 from flask import Flask
+from flask.logging import default_handler
 from flask_cors import CORS
 from app.routes import main_bp
+import atexit
+import logging
+import logging.handlers
 import os
+import queue
+
+
+# One queue and listener per process: app.logger is the process-wide "app"
+# logger, so every app instance shares them
+_log_queue = queue.Queue(-1)
+_log_listener = None
+
+
+def _configure_logging(app: Flask) -> None:
+    """
+    Send application log records through a queue
+    
+    Request threads only enqueue records; a background listener thread
+    formats them and writes to stderr, keeping log I/O off the request path.
+    Loggers under the "app" package (e.g. app.llm_client) propagate here.
+    Safe to call for every app instance; setup only happens once.
+    """
+    global _log_listener
+    if _log_listener is None:
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(
+            logging.Formatter('[%(asctime)s] %(levelname)s in %(module)s: %(message)s')
+        )
+        _log_listener = logging.handlers.QueueListener(
+            _log_queue, stream_handler, respect_handler_level=True
+        )
+        _log_listener.start()
+        atexit.register(_log_listener.stop)
+    
+    app.logger.removeHandler(default_handler)
+    if not any(isinstance(handler, logging.handlers.QueueHandler) for handler in app.logger.handlers):
+        app.logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+    app.logger.setLevel(logging.INFO)
 
 
 def create_app():
@@ -20,7 +58,17 @@ def create_app():
     
     # Configuration
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
-    app.config['JSON_SORT_KEYS'] = False
+    
+    # Use orjson for request parsing and response serialization when installed;
+    # otherwise keep the default provider, but compact and in insertion order
+    try:
+        from app.json_provider import OrjsonProvider
+        app.json = OrjsonProvider(app)
+    except ImportError:
+        app.json.sort_keys = False
+        app.json.compact = True
+    
+    _configure_logging(app)
     
     # Enable CORS for API endpoints
     CORS(app, resources={r"/api/*": {"origins": "*"}})
@@ -29,10 +77,3 @@ def create_app():
     app.register_blueprint(main_bp)
     
     return app
-
-
-if __name__ == '__main__':
-    app = create_app()
-    # Only enable debug mode if explicitly set in environment
-    debug_mode = os.getenv('FLASK_DEBUG', 'False').lower() in ('true', '1', 'yes')
-    app.run(debug=debug_mode, host='0.0.0.0', port=5000)
@@ -0,0 +1,31 @@
+"""
+JSON Provider Module
+Serializes API requests and responses with orjson instead of the json module
+"""
+
+from typing import Any, Union
+
+import orjson
+from flask.json.provider import JSONProvider
+
+
+def _default(obj: Any) -> Any:
+    """Serialize objects orjson does not handle natively"""
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(JSONProvider):
+    """
+    Flask JSON provider backed by orjson
+    Output is compact and keeps dict insertion order
+    """
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        """Serialize obj to a JSON string"""
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        """Deserialize a JSON string or bytes"""
+        return orjson.loads(s)
@@ -3,10 +3,196 @@ LLM Integration Module
 Handles communication with Large Language Models (OpenAI or simulated)
 """
 
+import asyncio
+import logging
 import os
-from typing import Optional, Dict, Any
+import re
+import threading
+from typing import Optional, Dict, Any, List
 import random
 
+logger = logging.getLogger(__name__)
+
+
+# Keywords that select a simulated response category, in priority order
+SIMULATION_KEYWORDS = [
+    ('mental_health', ['mental_health', 'anxiety', 'depression', 'stress']),
+    ('disease', ['disease', 'diabetes', 'cancer', 'health condition']),
+    ('contact', ['email', 'phone', 'contact']),
+    ('location', ['location', 'city', 'state', 'country']),
+    ('age', ['age']),
+]
+
+# One pass over the prompt finds every keyword occurrence. The lookahead makes
+# matches zero-width, so overlapping keywords are all seen, and alternation
+# order means the group number of a match is its category priority.
+_SIMULATION_RE = re.compile('(?=' + '|'.join(
+    '(' + '|'.join(re.escape(term) for term in terms) + ')'
+    for _, terms in SIMULATION_KEYWORDS
+) + ')')
+
+
+def _simulation_category(prompt_lower: str) -> Optional[str]:
+    """
+    Pick the highest priority simulation category mentioned in a prompt
+    
+    Args:
+        prompt_lower: Lowercased prompt
+        
+    Returns:
+        Category name, or None if no keyword occurs in the prompt
+    """
+    best = None
+    for match in _SIMULATION_RE.finditer(prompt_lower):
+        if best is None or match.lastindex < best:
+            best = match.lastindex
+            if best == 1:
+                break
+    return SIMULATION_KEYWORDS[best - 1][0] if best is not None else None
+
+
+# Simulated responses, built once at import and shared by every call
+
+# Mental health related responses
+_MENTAL_HEALTH_RESPONSES = (
+    "I understand you're dealing with [MENTAL_HEALTH_0]. It's important to seek professional help. "
+    "Consider talking to a licensed therapist or counselor who can provide personalized support. "
+    "Remember, taking care of your mental health is just as important as physical health.",
+
+    "Dealing with [MENTAL_HEALTH_0] can be challenging. Here are some steps that might help: "
+    "1) Reach out to a mental health professional, 2) Practice self-care activities, "
+    "3) Connect with supportive friends or family, 4) Consider mindfulness or meditation practices. "
+    "Would you like more specific information on any of these?",
+
+    "Thank you for sharing about [MENTAL_HEALTH_0]. Many people experience similar challenges. "
+    "Professional support can make a significant difference. If you're in crisis, please contact "
+    "a crisis helpline immediately. Otherwise, scheduling an appointment with a therapist can be "
+    "a great first step toward feeling better."
+)
+
+# Disease/health related responses
+_DISEASE_RESPONSES = (
+    "For [DISEASE_0], it's crucial to work closely with healthcare professionals. "
+    "They can provide proper diagnosis, treatment plans, and ongoing monitoring. "
+    "Additionally, maintaining a healthy lifestyle through proper diet, exercise, and "
+    "medication adherence (if prescribed) is important.",
+
+    "Managing [DISEASE_0] requires comprehensive medical care. I recommend: "
+    "1) Consulting with a specialist, 2) Following prescribed treatment plans, "
+    "3) Regular check-ups and monitoring, 4) Staying informed about your condition. "
+    "Your healthcare team can provide personalized guidance.",
+
+    "Living with [DISEASE_0] can present challenges, but modern medicine offers many "
+    "treatment options. Work with your healthcare provider to develop a management plan "
+    "that works for you. Support groups and patient education resources can also be helpful."
+)
+
+# Contact/personal information queries
+_CONTACT_RESPONSES = (
+    "I can help you with that. Based on your contact information ([EMAIL_0] or [PHONE_0]), "
+    "here's what I suggest: Make sure to keep your contact details updated and verify "
+    "the information before sharing with others.",
+
+    "Thanks for providing your contact details. For privacy reasons, always be careful about "
+    "where you share information like [EMAIL_0] and [PHONE_0]. Use secure channels when possible."
+)
+
+# Location-based queries
+_LOCATION_RESPONSES = (
+    "In [LOCATION_0], there are various resources available. I can help you find specific "
+    "services or information relevant to your area. What specific assistance are you looking for?",
+
+    "For someone in [LOCATION_0], I recommend checking local resources and services. "
+    "Many areas have community programs and support systems available."
+)
+
+# Age-related queries
+_AGE_RESPONSES = (
+    "At [AGE_0], it's important to consider age-appropriate recommendations. "
+    "Everyone's situation is unique, so personalized advice from professionals is valuable.",
+
+    "For someone who is [AGE_0], there are specific considerations to keep in mind. "
+    "I'm here to provide general information, but professional consultation is recommended "
+    "for personalized guidance."
+)
+
+# General helpful responses
+_GENERAL_RESPONSES = (
+    "I understand your concern. Based on the information you've provided, I recommend "
+    "consulting with appropriate professionals who can give you personalized advice. "
+    "Is there anything specific you'd like to know more about?",
+
+    "Thank you for your question. While I can provide general information, it's always best "
+    "to seek professional advice for personal matters. What specific aspect would you like "
+    "me to explain further?",
+
+    "I'm here to help. Based on your query, it seems you're looking for guidance on a "
+    "sensitive matter. Remember that professional experts in relevant fields can provide "
+    "the most accurate and personalized assistance. How can I assist you further?",
+
+    "That's an important question. Here's some general information that might help: "
+    "Always prioritize your well-being and don't hesitate to reach out to qualified "
+    "professionals when needed. What else would you like to know?"
+)
+
+_SIMULATED_RESPONSES = {
+    'mental_health': _MENTAL_HEALTH_RESPONSES,
+    'disease': _DISEASE_RESPONSES,
+    'contact': _CONTACT_RESPONSES,
+    'location': _LOCATION_RESPONSES,
+    'age': _AGE_RESPONSES,
+}
+
+
+# Upper bound on OpenAI requests in flight at once, to stay within rate limits
+MAX_CONCURRENT_REQUESTS = int(os.getenv('OPENAI_MAX_CONCURRENT', '32'))
+
+# All OpenAI calls run on one background event loop, so requests from every
+# server thread share a single async HTTP client and connection pool
+_event_loop = None
+_event_loop_lock = threading.Lock()
+
+
+def _get_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Get the background event loop for LLM requests, starting it on first use
+    
+    Returns:
+        Event loop running forever in a daemon thread
+    """
+    global _event_loop
+    with _event_loop_lock:
+        if _event_loop is None:
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name='llm-event-loop', daemon=True)
+            thread.start()
+            _event_loop = loop
+    return _event_loop
+
+
+# One pooled HTTP client shared by every LLMClient, so TCP/TLS connections
+# to the API stay warm across requests instead of being set up per call
+_http_client = None
+_http_client_lock = threading.Lock()
+
+
+def _get_http_client():
+    """
+    Get the shared async HTTP client used for OpenAI requests
+    
+    Returns:
+        httpx.AsyncClient with a bounded keep-alive connection pool
+    """
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            import httpx
+            _http_client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+                timeout=30.0
+            )
+    return _http_client
+
 
 class LLMClient:
     """
@@ -24,14 +210,16 @@ class LLMClient:
         """
         self.api_key = api_key or os.getenv('OPENAI_API_KEY')
         self.use_simulation = use_simulation
+        # Created lazily on the event loop thread it will be used from
+        self._semaphore = None
         
         if not use_simulation and self.api_key:
             try:
                 import openai
-                self.client = openai.OpenAI(api_key=self.api_key)
+                self.client = openai.AsyncOpenAI(api_key=self.api_key, http_client=_get_http_client())
             except Exception as e:
-                print(f"Warning: Failed to initialize OpenAI client: {e}")
-                print("Falling back to simulation mode")
+                logger.warning("Failed to initialize OpenAI client: %s. "
+                               "Falling back to simulation mode", e)
                 self.use_simulation = True
         else:
             self.use_simulation = True
@@ -52,6 +240,25 @@ class LLMClient:
         else:
             return self._call_openai_api(prompt, max_tokens)
     
+    def generate_responses(self, prompts: List[str], max_tokens: int = 500) -> List[str]:
+        """
+        Generate responses for several prompts concurrently
+        
+        Args:
+            prompts: Input prompts (should be masked)
+            max_tokens: Maximum tokens in each response
+            
+        Returns:
+            LLM response texts, in the same order as the prompts
+        """
+        if self.use_simulation:
+            return [self._simulate_response(prompt) for prompt in prompts]
+        
+        future = asyncio.run_coroutine_threadsafe(
+            self._agenerate_responses(prompts, max_tokens), _get_event_loop()
+        )
+        return future.result()
+    
     def _simulate_response(self, prompt: str) -> str:
         """
         Generate a simulated response for testing without API costs
@@ -63,101 +270,8 @@ class LLMClient:
             Simulated response
         """
         # Intelligent simulation based on prompt content
-        prompt_lower = prompt.lower()
-        
-        # Mental health related responses
-        if any(term in prompt_lower for term in ['mental_health', 'anxiety', 'depression', 'stress']):
-            responses = [
-                "I understand you're dealing with [MENTAL_HEALTH_0]. It's important to seek professional help. "
-                "Consider talking to a licensed therapist or counselor who can provide personalized support. "
-                "Remember, taking care of your mental health is just as important as physical health.",
-                
-                "Dealing with [MENTAL_HEALTH_0] can be challenging. Here are some steps that might help: "
-                "1) Reach out to a mental health professional, 2) Practice self-care activities, "
-                "3) Connect with supportive friends or family, 4) Consider mindfulness or meditation practices. "
-                "Would you like more specific information on any of these?",
-                
-                "Thank you for sharing about [MENTAL_HEALTH_0]. Many people experience similar challenges. "
-                "Professional support can make a significant difference. If you're in crisis, please contact "
-                "a crisis helpline immediately. Otherwise, scheduling an appointment with a therapist can be "
-                "a great first step toward feeling better."
-            ]
-            return random.choice(responses)
-        
-        # Disease/health related responses
-        elif any(term in prompt_lower for term in ['disease', 'diabetes', 'cancer', 'health condition']):
-            responses = [
-                "For [DISEASE_0], it's crucial to work closely with healthcare professionals. "
-                "They can provide proper diagnosis, treatment plans, and ongoing monitoring. "
-                "Additionally, maintaining a healthy lifestyle through proper diet, exercise, and "
-                "medication adherence (if prescribed) is important.",
-                
-                "Managing [DISEASE_0] requires comprehensive medical care. I recommend: "
-                "1) Consulting with a specialist, 2) Following prescribed treatment plans, "
-                "3) Regular check-ups and monitoring, 4) Staying informed about your condition. "
-                "Your healthcare team can provide personalized guidance.",
-                
-                "Living with [DISEASE_0] can present challenges, but modern medicine offers many "
-                "treatment options. Work with your healthcare provider to develop a management plan "
-                "that works for you. Support groups and patient education resources can also be helpful."
-            ]
-            return random.choice(responses)
-        
-        # Contact/personal information queries
-        elif any(term in prompt_lower for term in ['email', 'phone', 'contact']):
-            responses = [
-                "I can help you with that. Based on your contact information ([EMAIL_0] or [PHONE_0]), "
-                "here's what I suggest: Make sure to keep your contact details updated and verify "
-                "the information before sharing with others.",
-                
-                "Thanks for providing your contact details. For privacy reasons, always be careful about "
-                "where you share information like [EMAIL_0] and [PHONE_0]. Use secure channels when possible."
-            ]
-            return random.choice(responses)
-        
-        # Location-based queries
-        elif any(term in prompt_lower for term in ['location', 'city', 'state', 'country']):
-            responses = [
-                "In [LOCATION_0], there are various resources available. I can help you find specific "
-                "services or information relevant to your area. What specific assistance are you looking for?",
-                
-                "For someone in [LOCATION_0], I recommend checking local resources and services. "
-                "Many areas have community programs and support systems available."
-            ]
-            return random.choice(responses)
-        
-        # Age-related queries
-        elif 'age' in prompt_lower:
-            responses = [
-                "At [AGE_0], it's important to consider age-appropriate recommendations. "
-                "Everyone's situation is unique, so personalized advice from professionals is valuable.",
-                
-                "For someone who is [AGE_0], there are specific considerations to keep in mind. "
-                "I'm here to provide general information, but professional consultation is recommended "
-                "for personalized guidance."
-            ]
-            return random.choice(responses)
-        
-        # General helpful responses
-        else:
-            responses = [
-                "I understand your concern. Based on the information you've provided, I recommend "
-                "consulting with appropriate professionals who can give you personalized advice. "
-                "Is there anything specific you'd like to know more about?",
-                
-                "Thank you for your question. While I can provide general information, it's always best "
-                "to seek professional advice for personal matters. What specific aspect would you like "
-                "me to explain further?",
-                
-                "I'm here to help. Based on your query, it seems you're looking for guidance on a "
-                "sensitive matter. Remember that professional experts in relevant fields can provide "
-                "the most accurate and personalized assistance. How can I assist you further?",
-                
-                "That's an important question. Here's some general information that might help: "
-                "Always prioritize your well-being and don't hesitate to reach out to qualified "
-                "professionals when needed. What else would you like to know?"
-            ]
-            return random.choice(responses)
+        category = _simulation_category(prompt.lower())
+        return random.choice(_SIMULATED_RESPONSES.get(category, _GENERAL_RESPONSES))
     
     def _call_openai_api(self, prompt: str, max_tokens: int) -> str:
         """
@@ -171,7 +285,31 @@ class LLMClient:
             API response text
         """
         try:
-            response = self.client.chat.completions.create(
+            future = asyncio.run_coroutine_threadsafe(
+                self._acall_openai_api(prompt, max_tokens), _get_event_loop()
+            )
+            return future.result()
+        except Exception as e:
+            logger.warning("Error calling OpenAI API: %s", e)
+            # Fallback to simulation on error
+            return self._simulate_response(prompt)
+    
+    async def _acall_openai_api(self, prompt: str, max_tokens: int) -> str:
+        """
+        Send one chat completion request on the background event loop
+        
+        Args:
+            prompt: Input prompt
+            max_tokens: Maximum tokens in response
+            
+        Returns:
+            API response text
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        
+        async with self._semaphore:
+            response = await self.client.chat.completions.create(
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": "You are a helpful and empathetic AI assistant. "
@@ -181,11 +319,30 @@ class LLMClient:
                 max_tokens=max_tokens,
                 temperature=0.7
             )
-            return response.choices[0].message.content.strip()
-        except Exception as e:
-            print(f"Error calling OpenAI API: {e}")
-            # Fallback to simulation on error
-            return self._simulate_response(prompt)
+        return response.choices[0].message.content.strip()
+    
+    async def _agenerate_responses(self, prompts: List[str], max_tokens: int) -> List[str]:
+        """
+        Send chat completion requests for all prompts concurrently
+        
+        Args:
+            prompts: Input prompts
+            max_tokens: Maximum tokens in each response
+            
+        Returns:
+            API response texts, with simulated fallbacks for failed requests
+        """
+        results = await asyncio.gather(
+            *(self._acall_openai_api(prompt, max_tokens) for prompt in prompts),
+            return_exceptions=True
+        )
+        responses = []
+        for prompt, result in zip(prompts, results):
+            if isinstance(result, Exception):
+                logger.warning("Error calling OpenAI API: %s", result)
+                result = self._simulate_response(prompt)
+            responses.append(result)
+        return responses
 
 
 # Singleton instance for the application
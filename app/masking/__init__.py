@@ -2,6 +2,11 @@
 Masking module initialization
 """
 
-from .masker import PromptMasker, MaskingResult, mask_prompt, unmask_response
+from .masker import (
+    PromptMasker, MaskingResult, is_mask_cached, mask_prompt, mask_prompts, unmask_response
+)
 
-__all__ = ['PromptMasker', 'MaskingResult', 'mask_prompt', 'unmask_response']
+__all__ = [
+    'PromptMasker', 'MaskingResult', 'is_mask_cached', 'mask_prompt', 'mask_prompts',
+    'unmask_response',
+]
@@ -0,0 +1,32 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+Optional compiled version of the masker's span replacement loop
+
+Build in place with:  cythonize -i app/masking/_mask_fast.pyx
+masker.py falls back to the pure Python implementation when it is not built.
+"""
+
+
+cpdef str replace_spans(str text, list spans):
+    """
+    Replace non-overlapping (start, end, replacement) spans in one pass
+
+    Args:
+        text: Text to rewrite
+        spans: Spans sorted by start position
+
+    Returns:
+        Text with every span replaced
+    """
+    cdef list parts = []
+    cdef Py_ssize_t last_end = 0
+    cdef Py_ssize_t start, end
+    cdef tuple span
+    for span in spans:
+        start = span[0]
+        end = span[1]
+        parts.append(text[last_end:start])
+        parts.append(span[2])
+        last_end = end
+    parts.append(text[last_end:])
+    return ''.join(parts)
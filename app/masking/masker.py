@@ -3,24 +3,527 @@ Privacy-Preserving Prompt Masking Module
 Detects and masks sensitive personal information in user queries
 """
 
+import logging
+import os
+import queue
 import re
-from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass, field
+import threading
+import time
+from concurrent.futures import Future
+from enum import IntEnum
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Tuple, Optional
+from dataclasses import dataclass, replace
 
+from cachetools import TTLCache, cached
+from cachetools.keys import hashkey
 
-@dataclass
+try:
+    # RE2 matches in linear time with a DFA, which pays off on the wide
+    # keyword alternations below; the API used here is compatible with re
+    import re2 as _regex_engine
+except ImportError:
+    _regex_engine = re
+
+logger = logging.getLogger(__name__)
+
+
+# Mental health and disease terms
+MENTAL_HEALTH_TERMS = [
+    'depression', 'depressed', 'anxiety', 'anxious', 'panic attack', 'ptsd', 'bipolar',
+    'schizophrenia', 'ocd', 'adhd', 'eating disorder', 'anorexia', 'bulimia', 'addiction',
+    'suicidal', 'self-harm', 'mental health', 'mental illness', 'psychiatric',
+    'psychological condition'
+]
+
+DISEASE_TERMS = [
+    'diabetes', 'cancer', 'hiv', 'aids', 'covid', 'coronavirus', 'tuberculosis', 'hepatitis',
+    'heart disease', 'hypertension', 'asthma', 'copd', 'alzheimer', 'parkinson', 'epilepsy',
+    'arthritis', 'multiple sclerosis', 'lupus', 'crohn', 'celiac'
+]
+
+# Contact information patterns
+EMAIL_PATTERN = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+
+# Phone number patterns (various formats)
+PHONE_PATTERNS = [
+    r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b',  # 123-456-7890 or 1234567890
+    r'\b\(\d{3}\)\s*\d{3}[-.]?\d{4}\b',  # (123) 456-7890
+    r'\+\d{1,3}[-.\s]?\d{1,4}[-.\s]?\d{1,4}[-.\s]?\d{1,9}\b'  # +1-234-567-8900
+]
+
+# Personal information patterns
+AGE_PATTERN = r'\b(?:age|aged)[\s:]+\d{1,3}\b|\b\d{1,3}[\s-]?(?:year|yr)s?[\s-]?old\b'
+GENDER_TERMS = ['male', 'female', 'man', 'woman', 'boy', 'girl', 'transgender', 'non-binary', 'gender']
+
+# Location terms (cities, states, countries)
+MAJOR_US_CITIES = [
+    'New York', 'Los Angeles', 'Chicago', 'Houston', 'Phoenix', 'Philadelphia',
+    'San Antonio', 'San Diego', 'Dallas', 'San Jose', 'Austin', 'Jacksonville',
+    'Fort Worth', 'Columbus', 'Indianapolis', 'Charlotte', 'San Francisco',
+    'Seattle', 'Denver', 'Washington', 'Boston', 'Nashville', 'Baltimore',
+    'Oklahoma City', 'Louisville', 'Portland', 'Las Vegas', 'Milwaukee',
+    'Albuquerque', 'Tucson', 'Fresno', 'Sacramento', 'Kansas City', 'Mesa',
+    'Atlanta', 'Omaha', 'Colorado Springs', 'Raleigh', 'Miami', 'Long Beach',
+    'Virginia Beach', 'Oakland', 'Minneapolis', 'Tulsa', 'Tampa', 'Arlington',
+    'New Orleans'
+]
+
+US_STATES = [
+    'California', 'Texas', 'Florida', 'New York', 'Pennsylvania', 'Illinois',
+    'Ohio', 'Georgia', 'North Carolina', 'Michigan', 'Alabama', 'Alaska',
+    'Arizona', 'Arkansas', 'Colorado', 'Connecticut', 'Delaware', 'Hawaii',
+    'Idaho', 'Indiana', 'Iowa', 'Kansas', 'Kentucky', 'Louisiana', 'Maine',
+    'Maryland', 'Massachusetts', 'Minnesota', 'Mississippi', 'Missouri',
+    'Montana', 'Nebraska', 'Nevada', 'New Hampshire', 'New Jersey',
+    'New Mexico', 'North Dakota', 'Oklahoma', 'Oregon', 'Rhode Island',
+    'South Carolina', 'South Dakota', 'Tennessee', 'Utah', 'Vermont',
+    'Virginia', 'Washington', 'West Virginia', 'Wisconsin', 'Wyoming'
+]
+
+COUNTRIES = [
+    'USA', 'United States', 'America', 'UK', 'United Kingdom', 'England',
+    'Canada', 'Australia', 'Germany', 'France', 'Italy', 'Spain', 'India',
+    'China', 'Japan', 'Mexico', 'Brazil'
+]
+
+# Combine all locations into one keyword list
+LOCATION_TERMS = MAJOR_US_CITIES + US_STATES + COUNTRIES
+
+
+def _trie_pattern(node: Dict[str, dict]) -> str:
+    """Render one node of a character trie as a regex fragment"""
+    terminal = '' in node
+    branches = [re.escape(char) + _trie_pattern(child)
+                for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    if len(branches) == 1 and not terminal:
+        return branches[0]
+    group = '(?:' + '|'.join(branches) + ')'
+    return group + '?' if terminal else group
+
+
+def _keyword_pattern(terms: List[str]) -> str:
+    """
+    Build a whole-word, case-insensitive regex from a list of literal terms
+    
+    Terms are merged into a character trie so shared prefixes are matched
+    once (e.g. "new (?:hampshire|jersey|mexico|orleans|york)") instead of the
+    regex engine trying every alternative in turn at each position. Optional
+    suffixes are greedy, so the longest term wins, as with the automaton.
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term.lower():
+            node = node.setdefault(char, {})
+        node[''] = {}
+    return r'\b' + _trie_pattern(trie) + r'\b'
+
+
+# Literal keyword lists per category; these can be matched without regex
+KEYWORD_CATEGORIES = {
+    'MENTAL_HEALTH': MENTAL_HEALTH_TERMS,
+    'DISEASE': DISEASE_TERMS,
+    'LOCATION': LOCATION_TERMS,
+    'GENDER': GENDER_TERMS,
+}
+
+# Category order doubles as match priority: when two categories could match
+# at the same position, the one listed first wins
+MASKING_CATEGORIES = [
+    ('MENTAL_HEALTH', _keyword_pattern(MENTAL_HEALTH_TERMS)),
+    ('DISEASE', _keyword_pattern(DISEASE_TERMS)),
+    ('EMAIL', EMAIL_PATTERN),
+    ('PHONE', '|'.join(f'(?:{p})' for p in PHONE_PATTERNS)),
+    ('AGE', AGE_PATTERN),
+    ('LOCATION', _keyword_pattern(LOCATION_TERMS)),
+    ('GENDER', _keyword_pattern(GENDER_TERMS)),
+]
+
+# Characters (as regex character-class contents) that every match of a
+# structured category contains. Texts containing none of them skip the
+# structured scan; a structured category without a hint turns that off.
+STRUCTURED_HINTS = {
+    'EMAIL': '@',
+    'PHONE': r'\d',
+    'AGE': r'\d',
+}
+
+# Integer ids for every entity type, in priority order, plus spaCy person
+# names; hot paths index plain lists with these instead of hashing names
+EntityType = IntEnum('EntityType', [name for name, _ in MASKING_CATEGORIES] + ['NAME'], start=0)
+_ENTITY_IDS = {entity_type.name: int(entity_type) for entity_type in EntityType}
+_ENTITY_NAMES = [entity_type.name for entity_type in EntityType]
+_NAME_ID = int(EntityType.NAME)
+
+# Placeholder "[CATEGORY_n]" prefixes per entity id, so emitting a placeholder
+# only formats the counter
+_TOKEN_PREFIXES = [f"[{name}_" for name in _ENTITY_NAMES]
+
+
+def _compile_categories(categories: List[Tuple[str, str]]):
+    """
+    Combine categories into one alternation of named groups
+    
+    The matched category is read back from match.lastgroup. Case folding
+    is an inline flag so the pattern compiles the same under RE2; patterns
+    RE2 cannot handle (backreferences, lookarounds) fall back to re.
+    """
+    pattern = '(?i)' + '|'.join(f'(?P<{name}>{pattern})' for name, pattern in categories)
+    if _regex_engine is not re:
+        try:
+            return _regex_engine.compile(pattern)
+        except _regex_engine.error:
+            logger.warning("RE2 rejected a masking pattern; compiling it with re instead")
+    return re.compile(pattern)
+
+
+# Every category in a single scan of the text
+_MASK_RE = _compile_categories(MASKING_CATEGORIES)
+
+# Only the structured categories, used alongside the keyword automaton
+_STRUCTURED_CATEGORIES = [
+    (name, pattern) for name, pattern in MASKING_CATEGORIES if name not in KEYWORD_CATEGORIES
+]
+_STRUCTURED_RE = _compile_categories(_STRUCTURED_CATEGORIES)
+
+# Matches any hint character, or None when some structured category has no
+# hint and the structured scan must always run
+if all(name in STRUCTURED_HINTS for name, _ in _STRUCTURED_CATEGORIES):
+    _STRUCTURED_HINT_RE = re.compile(
+        '[' + ''.join(dict.fromkeys(STRUCTURED_HINTS[name] for name, _ in _STRUCTURED_CATEGORIES)) + ']'
+    )
+else:
+    _STRUCTURED_HINT_RE = None
+
+# Shorter texts cannot contain any entity; the shortest are keyword terms
+_MIN_MATCH_LENGTH = min(len(term) for terms in KEYWORD_CATEGORIES.values() for term in terms)
+
+
+def _build_keyword_automaton():
+    """
+    Build an Aho-Corasick automaton over all keyword terms
+    
+    Returns:
+        Automaton mapping each lowercased term to (length, entity id),
+        or None if pyahocorasick is not installed
+    """
+    try:
+        import ahocorasick
+    except ImportError:
+        logger.warning("pyahocorasick not installed; keyword terms are matched by the combined regex")
+        return None
+    
+    automaton = ahocorasick.Automaton()
+    for category, terms in KEYWORD_CATEGORIES.items():
+        for term in terms:
+            key = term.lower()
+            if key not in automaton:
+                automaton.add_word(key, (len(key), _ENTITY_IDS[category]))
+    automaton.make_automaton()
+    return automaton
+
+
+_KEYWORD_AUTOMATON = _build_keyword_automaton()
+
+
+def _is_word_char(char: str) -> bool:
+    """Match the regex notion of a word character"""
+    return char.isalnum() or char == '_'
+
+
+def _find_matches(text: str) -> List[Tuple[int, int, int]]:
+    """
+    Find non-overlapping sensitive entities in text
+    
+    Args:
+        text: Text to scan
+        
+    Returns:
+        (start, end, entity id) tuples sorted by start position
+    """
+    # Lowercasing non-ASCII text can change its length, which would shift
+    # automaton offsets, so those texts go through the combined regex
+    if _KEYWORD_AUTOMATON is None or not text.isascii():
+        return [(match.start(), match.end(), _ENTITY_IDS[match.lastgroup])
+                for match in _MASK_RE.finditer(text)]
+    
+    # Keyword hits sort as (start, entity id, -length) so the leftmost match
+    # wins, then the highest priority category, then the longest term
+    keyword_matches = []
+    text_length = len(text)
+    for last_index, (length, entity_id) in _KEYWORD_AUTOMATON.iter(text.lower()):
+        start = last_index - length + 1
+        end = last_index + 1
+        if start > 0 and _is_word_char(text[start - 1]):
+            continue
+        if end < text_length and _is_word_char(text[end]):
+            continue
+        keyword_matches.append((start, entity_id, -length))
+    keyword_matches.sort()
+    
+    # Merge keyword hits with structured regex matches the same way the
+    # combined regex would: take the leftmost match, then resume after it
+    matches = []
+    position = 0
+    index = 0
+    if _STRUCTURED_HINT_RE is None or _STRUCTURED_HINT_RE.search(text):
+        structured_iter = _STRUCTURED_RE.finditer(text)
+    else:
+        structured_iter = iter(())
+    structured = next(structured_iter, None)
+    while True:
+        while index < len(keyword_matches) and keyword_matches[index][0] < position:
+            index += 1
+        while structured is not None and structured.start() < position:
+            if structured.end() > position:
+                # A keyword cut into this match; rescan from the keyword's end
+                structured_iter = _STRUCTURED_RE.finditer(text, position)
+            structured = next(structured_iter, None)
+        keyword = keyword_matches[index] if index < len(keyword_matches) else None
+        
+        if structured is not None and (
+            keyword is None
+            or (structured.start(), _ENTITY_IDS[structured.lastgroup]) < keyword[:2]
+        ):
+            start, end = structured.start(), structured.end()
+            entity_id = _ENTITY_IDS[structured.lastgroup]
+        elif keyword is not None:
+            start, entity_id, negative_length = keyword
+            end = start - negative_length
+        else:
+            break
+        
+        matches.append((start, end, entity_id))
+        position = end
+    return matches
+
+
+@dataclass(frozen=True)
 class MaskingResult:
-    """Result of masking operation containing masked text and mappings"""
+    """
+    Result of masking operation containing masked text and mappings
+    
+    Fields cannot be reassigned, but mappings is a plain dict (so it serializes
+    as-is), which also makes results unhashable.
+    """
+    __slots__ = ('original_text', 'masked_text', 'mappings', 'detected_entities')
+    __hash__ = None
+    
     original_text: str
     masked_text: str
-    mappings: Dict[str, str] = field(default_factory=dict)
-    detected_entities: List[str] = field(default_factory=list)
+    mappings: Dict[str, str]
+    detected_entities: Tuple[Tuple[str, str], ...]
+    
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+    
+    def __setstate__(self, state):
+        # Frozen fields can only be restored around the dataclass __setattr__
+        for name, value in zip(self.__slots__, state):
+            object.__setattr__(self, name, value)
+    
+    @property
+    def detected_entities_strings(self) -> List[str]:
+        """Detected entities formatted as "CATEGORY: value" for display"""
+        return [f"{category}: {value}" for category, value in self.detected_entities]
+
+
+def _replace_spans(text: str, spans: List[Tuple[int, int, str]]) -> str:
+    """
+    Replace non-overlapping (start, end, replacement) spans in one pass
+    
+    Args:
+        text: Text to rewrite
+        spans: Spans sorted by start position
+        
+    Returns:
+        Text with every span replaced
+    """
+    parts = []
+    last_end = 0
+    for start, end, replacement in spans:
+        parts.append(text[last_end:start])
+        parts.append(replacement)
+        last_end = end
+    parts.append(text[last_end:])
+    return ''.join(parts)
+
+
+# Use the compiled replacement loop when _mask_fast.pyx has been built
+try:
+    from ._mask_fast import replace_spans as _replace_spans
+except ImportError:
+    pass
+
+
+@lru_cache(maxsize=1024)
+def _placeholder_pattern(placeholders: FrozenSet[str]):
+    """
+    Compile an alternation matching any of the given placeholders
+    
+    Args:
+        placeholders: Placeholders to match
+        
+    Returns:
+        Compiled pattern; longer placeholders come first in the alternation
+        so one is never matched inside another
+    """
+    return re.compile('|'.join(
+        re.escape(placeholder) for placeholder in sorted(placeholders, key=len, reverse=True)
+    ))
+
+
+# Environment values that switch a boolean setting off; the counterparts of
+# the truthy spellings run.py accepts
+_FALSY = frozenset({'false', '0', 'no', 'off', 'n', 'f'})
+
+# spaCy is loaded on the first NER request unless LAZY_SPACY is turned off,
+# in which case it is loaded when this module is imported
+LAZY_SPACY = os.environ.get('LAZY_SPACY', '').lower() not in _FALSY
+
+_spacy_load_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _load_spacy():
+    """
+    Load the spaCy pipeline once per process and share it across maskers
+    
+    Only the NER component is used for person names. It carries its own
+    tok2vec layer, so every other component is excluded rather than just
+    disabled and is never deserialized into memory.
+    
+    Returns:
+        spaCy Language object, or None if spaCy or its model is unavailable
+    """
+    try:
+        import spacy
+    except ImportError:
+        logger.warning("spaCy not installed. Using regex-only mode.")
+        return None
+    
+    try:
+        return spacy.load(
+            "en_core_web_sm",
+            exclude=["tok2vec", "tagger", "parser", "senter", "attribute_ruler", "lemmatizer"]
+        )
+    except OSError:
+        logger.warning("spaCy model not found. Using regex-only mode.")
+        return None
+
+
+# Concurrent NER requests arriving within this window are run as one batch
+NER_BATCH_WINDOW_MS = float(os.getenv('NER_BATCH_WINDOW_MS', '5'))
+NER_BATCH_SIZE = 16
+
+
+class _NerBatcher:
+    """
+    Coalesces spaCy NER calls from concurrent requests into nlp.pipe batches
+    
+    Callers block on a Future while a single worker thread collects texts for
+    up to NER_BATCH_WINDOW_MS (or NER_BATCH_SIZE texts) and runs them through
+    the pipeline together. Only the worker thread ever touches the pipeline.
+    """
+    
+    def __init__(self, nlp):
+        """
+        Start the batching worker
+        
+        Args:
+            nlp: Loaded spaCy Language object
+        """
+        self.nlp = nlp
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='ner-batcher', daemon=True)
+        self._thread.start()
+    
+    def person_spans(self, text: str) -> List[Tuple[int, int, str]]:
+        """
+        Find person names in text
+        
+        Args:
+            text: Text to run NER on
+            
+        Returns:
+            (start, end, name) tuples for every PERSON entity
+        """
+        return self.person_spans_many([text])[0]
+    
+    def person_spans_many(self, texts: List[str]) -> List[List[Tuple[int, int, str]]]:
+        """
+        Find person names in several texts, queued together so they share batches
+        
+        Args:
+            texts: Texts to run NER on
+            
+        Returns:
+            (start, end, name) tuples for every PERSON entity, per text
+        """
+        futures = []
+        for text in texts:
+            future = Future()
+            self._queue.put((text, future))
+            futures.append(future)
+        return [future.result() for future in futures]
+    
+    def _run(self):
+        """Worker loop: gather a batch, run it through nlp.pipe, resolve futures"""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + NER_BATCH_WINDOW_MS / 1000
+            while len(batch) < NER_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            try:
+                docs = self.nlp.pipe([text for text, _ in batch], batch_size=NER_BATCH_SIZE)
+                for doc, (_, future) in zip(docs, batch):
+                    future.set_result([(ent.start_char, ent.end_char, ent.text)
+                                       for ent in doc.ents if ent.label_ == "PERSON"])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+
+_ner_batcher = None
+_ner_batcher_lock = threading.Lock()
+
+
+def _get_ner_batcher(nlp) -> _NerBatcher:
+    """
+    Get the process-wide NER batcher, starting it on first use
+    
+    Args:
+        nlp: Loaded spaCy Language object (shared via _load_spacy)
+        
+    Returns:
+        _NerBatcher instance
+    """
+    global _ner_batcher
+    with _ner_batcher_lock:
+        if _ner_batcher is None:
+            _ner_batcher = _NerBatcher(nlp)
+    return _ner_batcher
 
 
 class PromptMasker:
     """
     Main class for masking and unmasking sensitive information in prompts
     Uses regex patterns and optional NER for detecting sensitive data
+    
+    Placeholder counters are local to each mask_text call and spaCy NER runs
+    on a single batching thread, so instances can be shared between threads;
+    the module-level helpers share one instance per spaCy setting.
     """
     
     def __init__(self, use_spacy: bool = False):
@@ -31,107 +534,19 @@ class PromptMasker:
             use_spacy: Whether to use spaCy NER for additional entity detection
         """
         self.use_spacy = use_spacy
-        self.nlp = None
-        
-        if use_spacy:
-            try:
-                import spacy
-                # Try to load the model, fallback to not using spacy if not available
-                try:
-                    self.nlp = spacy.load("en_core_web_sm")
-                except OSError:
-                    print("Warning: spaCy model not found. Using regex-only mode.")
-                    self.use_spacy = False
-            except ImportError:
-                print("Warning: spaCy not installed. Using regex-only mode.")
+        self._nlp = None
+    
+    @property
+    def nlp(self):
+        """spaCy pipeline, loaded on first access when use_spacy is set"""
+        if self.use_spacy and self._nlp is None:
+            with _spacy_load_lock:
+                self._nlp = _load_spacy()
+            
+            # Fall back to regex-only mode if spaCy or its model is unavailable
+            if self._nlp is None:
                 self.use_spacy = False
-        
-        # Mental health and disease patterns
-        self.mental_health_terms = [
-            r'\b(depression|depressed|anxiety|anxious|panic attack|ptsd|bipolar|schizophrenia|'
-            r'ocd|adhd|eating disorder|anorexia|bulimia|addiction|suicidal|self-harm|'
-            r'mental health|mental illness|psychiatric|psychological condition)\b'
-        ]
-        
-        self.disease_patterns = [
-            r'\b(diabetes|cancer|hiv|aids|covid|coronavirus|tuberculosis|hepatitis|'
-            r'heart disease|hypertension|asthma|copd|alzheimer|parkinson|epilepsy|'
-            r'arthritis|multiple sclerosis|lupus|crohn|celiac)\b'
-        ]
-        
-        # Contact information patterns
-        self.email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        
-        # Phone number patterns (various formats)
-        self.phone_patterns = [
-            r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b',  # 123-456-7890 or 1234567890
-            r'\b\(\d{3}\)\s*\d{3}[-.]?\d{4}\b',  # (123) 456-7890
-            r'\+\d{1,3}[-.\s]?\d{1,4}[-.\s]?\d{1,4}[-.\s]?\d{1,9}\b'  # +1-234-567-8900
-        ]
-        
-        # Personal information patterns
-        self.age_pattern = r'\b(?:age|aged)[\s:]+(\d{1,3})\b|\b(\d{1,3})[\s-]?(?:year|yr)s?[\s-]?old\b'
-        self.gender_pattern = r'\b(male|female|man|woman|boy|girl|transgender|non-binary|gender)\b'
-        
-        # Location patterns (cities, states, countries)
-        # Build location pattern from lists for better maintainability
-        major_us_cities = [
-            'New York', 'Los Angeles', 'Chicago', 'Houston', 'Phoenix', 'Philadelphia',
-            'San Antonio', 'San Diego', 'Dallas', 'San Jose', 'Austin', 'Jacksonville',
-            'Fort Worth', 'Columbus', 'Indianapolis', 'Charlotte', 'San Francisco',
-            'Seattle', 'Denver', 'Washington', 'Boston', 'Nashville', 'Baltimore',
-            'Oklahoma City', 'Louisville', 'Portland', 'Las Vegas', 'Milwaukee',
-            'Albuquerque', 'Tucson', 'Fresno', 'Sacramento', 'Kansas City', 'Mesa',
-            'Atlanta', 'Omaha', 'Colorado Springs', 'Raleigh', 'Miami', 'Long Beach',
-            'Virginia Beach', 'Oakland', 'Minneapolis', 'Tulsa', 'Tampa', 'Arlington',
-            'New Orleans'
-        ]
-        
-        us_states = [
-            'California', 'Texas', 'Florida', 'New York', 'Pennsylvania', 'Illinois',
-            'Ohio', 'Georgia', 'North Carolina', 'Michigan', 'Alabama', 'Alaska',
-            'Arizona', 'Arkansas', 'Colorado', 'Connecticut', 'Delaware', 'Hawaii',
-            'Idaho', 'Indiana', 'Iowa', 'Kansas', 'Kentucky', 'Louisiana', 'Maine',
-            'Maryland', 'Massachusetts', 'Minnesota', 'Mississippi', 'Missouri',
-            'Montana', 'Nebraska', 'Nevada', 'New Hampshire', 'New Jersey',
-            'New Mexico', 'North Dakota', 'Oklahoma', 'Oregon', 'Rhode Island',
-            'South Carolina', 'South Dakota', 'Tennessee', 'Utah', 'Vermont',
-            'Virginia', 'Washington', 'West Virginia', 'Wisconsin', 'Wyoming'
-        ]
-        
-        countries = [
-            'USA', 'United States', 'America', 'UK', 'United Kingdom', 'England',
-            'Canada', 'Australia', 'Germany', 'France', 'Italy', 'Spain', 'India',
-            'China', 'Japan', 'Mexico', 'Brazil'
-        ]
-        
-        # Combine all locations into pattern
-        all_locations = major_us_cities + us_states + countries
-        location_pattern_str = '|'.join(all_locations)
-        self.location_pattern = r'\b(' + location_pattern_str + r')\b'
-        
-        # Counter for generating unique placeholders
-        self.counters = {
-            'MENTAL_HEALTH': 0,
-            'DISEASE': 0,
-            'EMAIL': 0,
-            'PHONE': 0,
-            'NAME': 0,
-            'AGE': 0,
-            'GENDER': 0,
-            'LOCATION': 0
-        }
-    
-    def reset_counters(self):
-        """Reset all counters for a new masking session"""
-        for key in self.counters:
-            self.counters[key] = 0
-    
-    def _generate_placeholder(self, entity_type: str) -> str:
-        """Generate a unique placeholder token for an entity type"""
-        placeholder = f"[{entity_type}_{self.counters[entity_type]}]"
-        self.counters[entity_type] += 1
-        return placeholder
+        return self._nlp
     
     def mask_text(self, text: str) -> MaskingResult:
         """
@@ -143,96 +558,78 @@ class PromptMasker:
         Returns:
             MaskingResult object containing masked text and mappings
         """
-        self.reset_counters()
-        masked_text = text
-        mappings = {}
-        detected_entities = []
-        
-        # Apply regex-based masking in specific order
-        # 1. Mental health conditions
-        for pattern in self.mental_health_terms:
-            matches = list(re.finditer(pattern, masked_text, re.IGNORECASE))
-            for match in reversed(matches):  # Reverse to maintain positions
-                original = match.group(0)
-                placeholder = self._generate_placeholder('MENTAL_HEALTH')
-                mappings[placeholder] = original
-                detected_entities.append(f"MENTAL_HEALTH: {original}")
-                masked_text = masked_text[:match.start()] + placeholder + masked_text[match.end():]
-        
-        # 2. Diseases
-        for pattern in self.disease_patterns:
-            matches = list(re.finditer(pattern, masked_text, re.IGNORECASE))
-            for match in reversed(matches):
-                original = match.group(0)
-                placeholder = self._generate_placeholder('DISEASE')
-                mappings[placeholder] = original
-                detected_entities.append(f"DISEASE: {original}")
-                masked_text = masked_text[:match.start()] + placeholder + masked_text[match.end():]
-        
-        # 3. Email addresses
-        matches = list(re.finditer(self.email_pattern, masked_text))
-        for match in reversed(matches):
-            original = match.group(0)
-            placeholder = self._generate_placeholder('EMAIL')
-            mappings[placeholder] = original
-            detected_entities.append(f"EMAIL: {original}")
-            masked_text = masked_text[:match.start()] + placeholder + masked_text[match.end():]
+        return self.mask_texts([text])[0]
+    
+    def mask_texts(self, texts: List[str]) -> List[MaskingResult]:
+        """
+        Mask several texts, running spaCy NER over all of them in shared batches
         
-        # 4. Phone numbers
-        for pattern in self.phone_patterns:
-            matches = list(re.finditer(pattern, masked_text))
-            for match in reversed(matches):
-                original = match.group(0)
-                placeholder = self._generate_placeholder('PHONE')
+        Args:
+            texts: Original texts containing potential sensitive information
+            
+        Returns:
+            MaskingResult objects in the same order as texts
+        """
+        results = []
+        pending = []
+        for text in texts:
+            if len(text) < _MIN_MATCH_LENGTH:
+                results.append(MaskingResult(
+                    original_text=text,
+                    masked_text=text,
+                    mappings={},
+                    detected_entities=()
+                ))
+                continue
+            
+            counts = [0] * len(_ENTITY_NAMES)
+            mappings = {}
+            detected_entities = []
+            spans = []
+            
+            # Regex and keyword masking of every category
+            for start, end, entity_id in _find_matches(text):
+                original = text[start:end]
+                entity_type = _ENTITY_NAMES[entity_id]
+                placeholder = f"{_TOKEN_PREFIXES[entity_id]}{counts[entity_id]}]"
+                counts[entity_id] += 1
                 mappings[placeholder] = original
-                detected_entities.append(f"PHONE: {original}")
-                masked_text = masked_text[:match.start()] + placeholder + masked_text[match.end():]
-        
-        # 5. Age
-        matches = list(re.finditer(self.age_pattern, masked_text, re.IGNORECASE))
-        for match in reversed(matches):
-            original = match.group(0)
-            placeholder = self._generate_placeholder('AGE')
-            mappings[placeholder] = original
-            detected_entities.append(f"AGE: {original}")
-            masked_text = masked_text[:match.start()] + placeholder + masked_text[match.end():]
-        
-        # 6. Locations (before person names to avoid false positives)
-        matches = list(re.finditer(self.location_pattern, masked_text, re.IGNORECASE))
-        for match in reversed(matches):
-            original = match.group(0)
-            placeholder = self._generate_placeholder('LOCATION')
-            mappings[placeholder] = original
-            detected_entities.append(f"LOCATION: {original}")
-            masked_text = masked_text[:match.start()] + placeholder + masked_text[match.end():]
+                detected_entities.append((entity_type, original))
+                spans.append((start, end, placeholder))
+            
+            pending.append((len(results), text, _replace_spans(text, spans),
+                            counts, mappings, detected_entities))
+            results.append(None)
         
-        # 7. Gender terms
-        matches = list(re.finditer(self.gender_pattern, masked_text, re.IGNORECASE))
-        for match in reversed(matches):
-            original = match.group(0)
-            placeholder = self._generate_placeholder('GENDER')
-            mappings[placeholder] = original
-            detected_entities.append(f"GENDER: {original}")
-            masked_text = masked_text[:match.start()] + placeholder + masked_text[match.end():]
+        # Use spaCy for person names if enabled
+        if self.use_spacy and self.nlp and pending:
+            person_spans = _get_ner_batcher(self.nlp).person_spans_many(
+                [masked_text for _, _, masked_text, _, _, _ in pending]
+            )
+        else:
+            person_spans = [[] for _ in pending]
         
-        # 8. Use spaCy for person names if enabled
-        if self.use_spacy and self.nlp:
-            doc = self.nlp(masked_text)
-            # Process in reverse order to maintain positions
-            person_entities = [(ent.start_char, ent.end_char, ent.text) 
-                             for ent in doc.ents if ent.label_ == "PERSON"]
-            for start, end, text in reversed(person_entities):
-                placeholder = self._generate_placeholder('NAME')
-                mappings[placeholder] = text
-                detected_entities.append(f"NAME: {text}")
-                masked_text = masked_text[:start] + placeholder + masked_text[end:]
+        for (index, text, masked_text, counts, mappings, detected_entities), names in zip(
+            pending, person_spans
+        ):
+            spans = []
+            for start, end, name in names:
+                placeholder = f"{_TOKEN_PREFIXES[_NAME_ID]}{counts[_NAME_ID]}]"
+                counts[_NAME_ID] += 1
+                mappings[placeholder] = name
+                detected_entities.append(('NAME', name))
+                spans.append((start, end, placeholder))
+            if spans:
+                masked_text = _replace_spans(masked_text, spans)
+            
+            results[index] = MaskingResult(
+                original_text=text,
+                masked_text=masked_text,
+                mappings=mappings,
+                detected_entities=tuple(detected_entities)
+            )
         
-        return MaskingResult(
-            original_text=text,
-            masked_text=masked_text,
-            mappings=mappings,
-            detected_entities=detected_entities
-        )
+        return results
     
     def unmask_text(self, masked_text: str, mappings: Dict[str, str]) -> str:
         """
@@ -245,14 +642,22 @@ class PromptMasker:
         Returns:
             Unmasked text with original values restored
         """
-        unmasked_text = masked_text
+        if not mappings or not masked_text:
+            return masked_text
         
-        # Sort placeholders by their position in the text to replace in order
-        # Replace all placeholders with their original values
-        for placeholder, original in mappings.items():
-            unmasked_text = unmasked_text.replace(placeholder, original)
-        
-        return unmasked_text
+        # Replace all placeholders in one pass
+        pattern = _placeholder_pattern(frozenset(mappings))
+        return pattern.sub(lambda match: mappings[match.group(0)], masked_text)
+
+
+# PromptMasker keeps no per-call state, so every thread shares one masker
+# per spaCy setting; the spaCy one only loads its pipeline on first use
+_shared_maskers = {
+    False: PromptMasker(),
+    True: PromptMasker(use_spacy=True),
+}
+if not LAZY_SPACY:
+    _load_spacy()
 
 
 def mask_prompt(text: str, use_spacy: bool = False) -> MaskingResult:
@@ -266,8 +671,55 @@ def mask_prompt(text: str, use_spacy: bool = False) -> MaskingResult:
     Returns:
         MaskingResult object
     """
-    masker = PromptMasker(use_spacy=use_spacy)
-    return masker.mask_text(text)
+    result = _mask_prompt_cached(text, bool(use_spacy))
+    # Give each caller its own mappings dict so the cached result stays intact
+    return replace(result, mappings=dict(result.mappings))
+
+
+# Recent masking results, kept no longer than the routes keep cached
+# responses and session mappings so prompts do not outlive them in memory
+MASK_CACHE_SIZE = 4096
+MASK_CACHE_TTL = 3600  # seconds
+_mask_cache = TTLCache(maxsize=MASK_CACHE_SIZE, ttl=MASK_CACHE_TTL)
+_mask_cache_lock = threading.Lock()
+
+
+@cached(cache=_mask_cache, lock=_mask_cache_lock)
+def _mask_prompt_cached(text: str, use_spacy: bool) -> MaskingResult:
+    """Mask a prompt with the shared masker; masking is deterministic per input"""
+    return _shared_maskers[use_spacy].mask_text(text)
+
+
+def is_mask_cached(text: str, use_spacy: bool = False) -> bool:
+    """
+    Check whether mask_prompt currently holds a memoized result
+    
+    Args:
+        text: Original text to mask
+        use_spacy: Whether to use spaCy NER
+        
+    Returns:
+        True if mask_prompt would return without masking the text again
+    """
+    with _mask_cache_lock:
+        return hashkey(text, bool(use_spacy)) in _mask_cache
+
+
+def mask_prompts(texts: Iterable[str], use_spacy: bool = False) -> List[MaskingResult]:
+    """
+    Convenience function to mask several prompts in one call
+    
+    With spaCy enabled, NER runs over all prompts in shared nlp.pipe batches
+    instead of one prompt at a time.
+    
+    Args:
+        texts: Original texts to mask
+        use_spacy: Whether to use spaCy NER
+        
+    Returns:
+        MaskingResult objects in the same order as texts
+    """
+    return _shared_maskers[bool(use_spacy)].mask_texts(list(texts))
 
 
 def unmask_response(masked_text: str, mappings: Dict[str, str]) -> str:
@@ -281,5 +733,4 @@ def unmask_response(masked_text: str, mappings: Dict[str, str]) -> str:
     Returns:
         Unmasked text
     """
-    masker = PromptMasker()
-    return masker.unmask_text(masked_text, mappings)
+    return _shared_maskers[False].unmask_text(masked_text, mappings)
@@ -1,13 +1,73 @@
-from flask import Blueprint, request, jsonify, render_template, session
-from app.masking import mask_prompt, unmask_response
+from flask import Blueprint, current_app, request, jsonify, render_template, session
+from cachetools import LRUCache, TTLCache
+from app.masking import MaskingResult, is_mask_cached, mask_prompt, unmask_response
 from app.llm_client import get_llm_client
-from typing import Dict, Any
-import traceback
+from typing import Dict, Any, Optional, Sequence, Tuple
+import hashlib
+import threading
 import uuid
 
 # Create Blueprint
 main_bp = Blueprint('main', __name__)
 
+# Exact-match cache of /api/chat results: repeated prompts skip masking, the
+# LLM call and unmasking. /api/mask relies on mask_prompt's own memo instead.
+# TTLCache is not thread-safe, hence the lock.
+RESPONSE_CACHE_SIZE = 10_000
+RESPONSE_CACHE_TTL = 3600  # seconds
+_response_cache = TTLCache(maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL)
+_response_cache_lock = threading.Lock()
+
+
+def _cache_key(endpoint: str, text: str, use_spacy: bool) -> Tuple[str, str, bool]:
+    """Build a response cache key from the endpoint, prompt hash and spaCy flag"""
+    digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    return endpoint, digest, bool(use_spacy)
+
+
+def _cache_get(key: Tuple[str, str, bool]) -> Optional[Dict[str, Any]]:
+    """Look up a cached endpoint result"""
+    with _response_cache_lock:
+        return _response_cache.get(key)
+
+
+def _cache_set(key: Tuple[str, str, bool], value: Dict[str, Any]) -> None:
+    """Store an endpoint result in the response cache"""
+    with _response_cache_lock:
+        _response_cache[key] = value
+
+
+# Placeholder mappings per session, kept server-side so original values never
+# travel in the session cookie. Idle sessions expire and each session keeps
+# only its most recently used mappings, so memory stays bounded.
+SESSION_MAPPINGS_MAX_SESSIONS = 10_000
+SESSION_MAPPINGS_TTL = 3600  # seconds
+SESSION_MAPPINGS_PER_SESSION = 1000
+session_mappings = TTLCache(maxsize=SESSION_MAPPINGS_MAX_SESSIONS, ttl=SESSION_MAPPINGS_TTL)
+_session_mappings_lock = threading.Lock()
+
+
+def _store_session_mappings(session_id: str, mappings: Dict[str, str]) -> None:
+    """Merge new placeholder mappings into a session and refresh its expiry"""
+    with _session_mappings_lock:
+        stored = session_mappings.get(session_id)
+        if stored is None:
+            stored = LRUCache(maxsize=SESSION_MAPPINGS_PER_SESSION)
+        stored.update(mappings)
+        session_mappings[session_id] = stored
+
+
+def _detected_entities(result: MaskingResult) -> Sequence[Any]:
+    """
+    Render detected entities in the format requested by the client
+    
+    Entities are [category, value] pairs by default; clients that want
+    "CATEGORY: value" strings opt in with ?entity_format=string
+    """
+    if request.args.get('entity_format') == 'string':
+        return result.detected_entities_strings
+    return result.detected_entities
+
 
 @main_bp.route('/')
 def index():
@@ -15,8 +75,6 @@ def index():
     # Initialize session if needed
     if 'session_id' not in session:
         session['session_id'] = str(uuid.uuid4())
-    if 'mappings' not in session:
-        session['mappings'] = {}
     return render_template('index.html')
 
 
@@ -25,6 +83,9 @@ def chat():
     """
     Main chat endpoint - handles end-to-end privacy-preserving conversation
     
+    Query parameters:
+        entity_format: "string" to get detected entities as "CATEGORY: value"
+    
     Request JSON:
         {
             "message": "user query text",
@@ -39,8 +100,9 @@ def chat():
             "masked_prompt": "masked query with placeholders",
             "llm_response": "masked LLM response",
             "final_response": "unmasked final response",
-            "detected_entities": ["list of detected sensitive entities"],
-            "session_id": "session identifier"
+            "detected_entities": [["CATEGORY", "detected value"], ...],
+            "session_id": "session identifier",
+            "cached": false
         }
     """
     try:
@@ -56,35 +118,46 @@ def chat():
         session_id = data.get('session_id', session.get('session_id', 'default'))
         use_spacy = data.get('use_spacy', False)
         
-        # Step 1: Mask the prompt
-        masking_result = mask_prompt(original_message, use_spacy=use_spacy)
+        cache_key = _cache_key('chat', original_message, use_spacy)
+        cached = _cache_get(cache_key)
+        is_cached = cached is not None
         
-        # Store mappings in session (server-side, more secure)
-        if 'mappings' not in session:
-            session['mappings'] = {}
-        session['mappings'].update(masking_result.mappings)
-        session.modified = True
+        if not is_cached:
+            # Step 1: Mask the prompt
+            masking_result = mask_prompt(original_message, use_spacy=use_spacy)
+            
+            # Step 2: Send masked prompt to LLM
+            llm_client = get_llm_client(use_simulation=True)
+            llm_response = llm_client.generate_response(masking_result.masked_text)
+            
+            # Step 3: Unmask the LLM response
+            final_response = unmask_response(llm_response, masking_result.mappings)
+            
+            cached = {
+                'masking_result': masking_result,
+                'llm_response': llm_response,
+                'final_response': final_response
+            }
+            _cache_set(cache_key, cached)
         
-        # Step 2: Send masked prompt to LLM
-        llm_client = get_llm_client(use_simulation=True)
-        llm_response = llm_client.generate_response(masking_result.masked_text)
+        masking_result = cached['masking_result']
         
-        # Step 3: Unmask the LLM response
-        final_response = unmask_response(llm_response, masking_result.mappings)
+        # Store mappings for the session (server-side, more secure)
+        _store_session_mappings(session_id, masking_result.mappings)
         
         return jsonify({
             'success': True,
             'original_prompt': original_message,
             'masked_prompt': masking_result.masked_text,
-            'llm_response': llm_response,
-            'final_response': final_response,
-            'detected_entities': masking_result.detected_entities,
-            'session_id': session_id
+            'llm_response': cached['llm_response'],
+            'final_response': cached['final_response'],
+            'detected_entities': _detected_entities(masking_result),
+            'session_id': session_id,
+            'cached': is_cached
         })
     
     except Exception as e:
-        print(f"Error in chat endpoint: {str(e)}")
-        traceback.print_exc()
+        current_app.logger.exception("Error in chat endpoint")
         return jsonify({
             'success': False,
             'error': f'Internal server error: {str(e)}'
@@ -96,6 +169,9 @@ def mask():
     """
     Endpoint to mask text only
     
+    Query parameters:
+        entity_format: "string" to get detected entities as "CATEGORY: value"
+    
     Request JSON:
         {
             "text": "text to mask",
@@ -108,7 +184,8 @@ def mask():
             "original_text": "original text",
             "masked_text": "masked text",
             "mappings": {"[PLACEHOLDER_0]": "original_value"},
-            "detected_entities": ["list of entities"]
+            "detected_entities": [["CATEGORY", "detected value"], ...],
+            "cached": false
         }
     """
     try:
@@ -123,6 +200,8 @@ def mask():
         text = data['text']
         use_spacy = data.get('use_spacy', False)
         
+        # mask_prompt memoizes its results, so that is the only copy kept
+        is_cached = is_mask_cached(text, use_spacy=use_spacy)
         result = mask_prompt(text, use_spacy=use_spacy)
         
         return jsonify({
@@ -130,12 +209,12 @@ def mask():
             'original_text': result.original_text,
             'masked_text': result.masked_text,
             'mappings': result.mappings,
-            'detected_entities': result.detected_entities
+            'detected_entities': _detected_entities(result),
+            'cached': is_cached
         })
     
     except Exception as e:
-        print(f"Error in mask endpoint: {str(e)}")
-        traceback.print_exc()
+        current_app.logger.exception("Error in mask endpoint")
         return jsonify({
             'success': False,
             'error': f'Internal server error: {str(e)}'
@@ -181,8 +260,7 @@ def unmask():
         })
     
     except Exception as e:
-        print(f"Error in unmask endpoint: {str(e)}")
-        traceback.print_exc()
+        current_app.logger.exception("Error in unmask endpoint")
         return jsonify({
             'success': False,
             'error': f'Internal server error: {str(e)}'
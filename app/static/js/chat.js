@@ -200,11 +200,11 @@ function updatePrivacyDetails(data) {
     }
     
     let entitiesHtml = '';
-    data.detected_entities.forEach(entity => {
+    data.detected_entities.forEach(([category, value]) => {
         entitiesHtml += `
             <div class="detected-entity">
                 <i class="fas fa-exclamation-triangle"></i>
-                ${escapeHtml(entity)}
+                ${escapeHtml(`${category}: ${value}`)}
             </div>
         `;
     });
@@ -0,0 +1,19 @@
+"""
+Gunicorn configuration for production deployments
+Usage: gunicorn -c gunicorn_conf.py "app:create_app()"
+"""
+
+import multiprocessing
+import os
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '5000')}"
+
+# Threaded workers: chat requests spend most of their time waiting on the
+# LLM, and threads in one worker share its maskers and LLM event loop
+worker_class = 'gthread'
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+
+# Leave room for slow LLM responses before a worker is recycled
+timeout = 60
+keepalive = 5
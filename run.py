@@ -1,13 +1,47 @@
 """
 Main entry point for the Flask application
+
+`python run.py` serves the app with gunicorn using gunicorn_conf.py. Set
+FLASK_DEV=1 (or FLASK_DEBUG=True) to run the Flask development server instead.
 """
 
-from app import create_app
+import importlib.util
 import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+GUNICORN_CONF = os.path.join(BASE_DIR, 'gunicorn_conf.py')
+
+# Environment values that switch a boolean setting on
+_TRUTHY = frozenset({'true', '1', 'yes', 'on', 'y', 't'})
+
+
+def _gunicorn_available() -> bool:
+    """Gunicorn only runs on POSIX systems and may not be installed"""
+    return os.name == 'posix' and importlib.util.find_spec('gunicorn') is not None
 
-app = create_app()
 
 if __name__ == '__main__':
     # Only enable debug mode if explicitly set in environment (default: False for security)
-    debug_mode = os.getenv('FLASK_DEBUG', 'False').lower() in ('true', '1', 'yes')
-    app.run(debug=debug_mode, host='0.0.0.0', port=5000)
+    debug_mode = os.environ.get('FLASK_DEBUG', '').lower() in _TRUTHY
+    dev_mode = os.environ.get('FLASK_DEV', '').lower() in _TRUTHY
+
+    if dev_mode or debug_mode or not _gunicorn_available():
+        from app import create_app
+        app = create_app()
+        # Same address as gunicorn_conf.py binds
+        app.run(
+            debug=debug_mode,
+            host=os.getenv('HOST', '0.0.0.0'),
+            port=int(os.getenv('PORT', '5000'))
+        )
+    else:
+        # Replace this process with gunicorn; each worker builds its own app, so
+        # the app package is not imported here
+        os.execv(sys.executable, [
+            sys.executable, '-m', 'gunicorn', '-c', GUNICORN_CONF, '--chdir', BASE_DIR,
+            'app:create_app()'
+        ])
+else:
+    from app import create_app
+    app = create_app()